@@ -2,6 +2,7 @@ from .types import Tool, Servlet, ServletSearchResult, ProfileSlug, MCPRunError
 from .task import Task, TaskRun, TaskRunError
 from .profile import Profile
 from .client import Client
+from .async_client import AsyncClient
 from .config import ClientConfig
 from .plugin import InstalledPlugin
 from .mcp_protocol import MCPServer
@@ -9,6 +10,7 @@ from .mcp_protocol import MCPServer
 __all__ = [
     "Tool",
     "Client",
+    "AsyncClient",
     "ClientConfig",
     "CallResult",
     "InstalledPlugin",
@@ -0,0 +1,420 @@
+from typing import Callable, Dict, Iterable, List, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import logging
+import time
+
+import httpx
+import orjson
+import extism as ext
+import zstandard
+
+from .api import Api
+from .types import Servlet, ServletSearchResult, CallResult, Tool, ProfileSlug
+from .profile import Profile
+from .plugin import InstalledPlugin
+from .config import ClientConfig, _default_session_id
+from .client import (
+    Client,
+    User,
+    UserEmail,
+    _servlet_from_json,
+    _unchanged,
+    _search_result_from_json,
+    _manifest,
+    _compile_validator,
+    _validate_input,
+)
+
+
+class AsyncClient:
+    """
+    Asynchronous client for the mcp.run API, backed by httpx.
+
+    Requests share a single HTTP/2 connection, so independent calls issued
+    with `asyncio.gather` are multiplexed instead of paying one round trip
+    each. Extism plugins are instantiated and called in worker threads to
+    keep the event loop responsive.
+
+    Example:
+        ```python
+        async with AsyncClient() as client:
+            results = await client.call_tool_many(
+                [
+                    ("eval-js", {"code": "1 + 1"}),
+                    ("fetch", {"url": "https://example.com"}),
+                ]
+            )
+        ```
+
+    Args:
+        session_id: Optional session ID for authentication. If not provided,
+                   will attempt to load from environment.
+        config: Optional ClientConfig instance to customize behavior.
+        log_level: Optional logging level (e.g. logging.INFO).
+    """
+
+    config: ClientConfig
+    """
+    Client configuration
+    """
+
+    session_id: str
+    """
+    mcp.run session ID
+    """
+
+    logger: logging.Logger
+    """
+    Python logger
+    """
+
+    api: Api
+    """
+    mcp.run api endpoints
+    """
+
+    install_cache: Dict[str, Servlet]
+    """
+    Cache of Installs
+    """
+
+    plugin_cache: Dict[str, InstalledPlugin]
+    """
+    Cache of InstalledPlugins
+    """
+
+    _http: httpx.AsyncClient
+    """
+    HTTP/2 client shared by all requests
+    """
+
+    _installs_ts: float | None
+    """
+    Monotonic time of the last installs refresh for the current profile
+    """
+
+    _installs_lock: asyncio.Lock
+    """
+    Held while refreshing installs so concurrent lookups share one request
+    """
+
+    _plugin_locks: Dict[str, asyncio.Lock]
+    """
+    Per-servlet locks held while creating or calling the cached plugin,
+    since a plugin instance isn't reentrant
+    """
+
+    _validators: Dict[str, Callable[[dict], object]]
+    """
+    Compiled input schema validators, keyed by tool name
+    """
+
+    _user: User | None = None
+
+    def __init__(
+        self,
+        session_id: str | None = None,
+        config: ClientConfig | None = None,
+        log_level: int | None = None,
+        *args,
+        **kw,
+    ):
+        if session_id is None:
+            session_id = _default_session_id()
+        if config is None:
+            config = ClientConfig(*args, **kw)
+        self.session_id = session_id
+        self.api = Api(config.base_url)
+        self._http = httpx.AsyncClient(
+            http2=True, follow_redirects=True, cookies={"sessionId": session_id}
+        )
+        self.install_cache = {}
+        self.plugin_cache = {}
+        self.logger = config.logger
+        self.config = config
+        self._user = None
+        self._installs_ts = None
+        self._installs_lock = asyncio.Lock()
+        self._plugin_locks = {}
+        self._validators = {}
+
+        if log_level is not None:
+            logging.basicConfig(level=log_level)
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        """
+        Close the underlying HTTP connections
+        """
+        await self._http.aclose()
+
+    def _fix_profile(self, profile: str | ProfileSlug | Profile | None) -> ProfileSlug:
+        if isinstance(profile, ProfileSlug):
+            return profile
+        elif isinstance(profile, Profile):
+            return ProfileSlug.parse(profile.slug)
+        elif profile is None:
+            return ProfileSlug.parse(self.config.profile or "default")
+        return ProfileSlug.parse(profile)
+
+    def clear_cache(self):
+        self.install_cache = {}
+        self.plugin_cache = {}
+        self._installs_ts = None
+        self._validators = {}
+
+    async def user(self) -> User:
+        """
+        Get current logged in user
+        """
+        if self._user is not None:
+            return self._user
+        res = await self._http.get(self.api.current_user())
+        res.raise_for_status()
+        data = orjson.loads(res.content)
+        self._user = User(
+            username=data["username"],
+            emails=[
+                UserEmail(
+                    email=x["email"], primary=x["primary"], verified=x["verified"]
+                )
+                for x in data["emails"]
+            ],
+        )
+        return self._user
+
+    async def list_installs(
+        self, profile: str | Profile | ProfileSlug | None = None
+    ) -> List[Servlet]:
+        """
+        List all installed servlets, this will make an HTTP
+        request each time
+        """
+        profile = self._fix_profile(profile)
+        url = self.api.installations(profile)
+        self.logger.info(f"Listing installed mcp.run servlets from {url}")
+        res = await self._http.get(url)
+        res.raise_for_status()
+        data = orjson.loads(res.content)
+        installs = []
+        for install in data["installs"]:
+            prior = self.install_cache.get(install.get("name", ""))
+            if _unchanged(prior, install):
+                install = prior
+            else:
+                if prior is not None:
+                    for name in prior.tools:
+                        self._validators.pop(name, None)
+                install = _servlet_from_json(install)
+                self.install_cache[install.name] = install
+                self.plugin_cache.pop(install.name, None)
+            installs.append(install)
+        if profile == self._fix_profile(None):
+            self._installs_ts = time.monotonic()
+        return installs
+
+    async def installs(self) -> Dict[str, Servlet]:
+        """
+        Get all installed servlets, this will returned cached Installs if
+        the cache timeout hasn't been reached
+        """
+        async with self._installs_lock:
+            ts = self._installs_ts
+            if (
+                ts is None
+                or time.monotonic() - ts
+                >= self.config.tool_refresh_time.total_seconds()
+            ):
+                await self.list_installs()
+        return self.install_cache
+
+    async def tools(self) -> Dict[str, Tool]:
+        """
+        Get all tools from all installed servlets
+        """
+        installs = await self.installs()
+        return {
+            tool.name: tool
+            for install in installs.values()
+            for tool in install.tools.values()
+        }
+
+    async def tool(self, name: str) -> Tool | None:
+        """
+        Get a tool by name
+        """
+        return (await self.tools()).get(name)
+
+    async def search(self, query: str) -> List[ServletSearchResult]:
+        """
+        Search for tools on mcp.run
+        """
+        res = await self._http.get(self.api.search(query))
+        res.raise_for_status()
+        return [_search_result_from_json(s) for s in orjson.loads(res.content)]
+
+    async def _fetch_content(self, install: Servlet):
+        addr = install.content_addr
+        self.logger.info(f"Fetching servlet Wasm for {install.name}: {addr}")
+        res = await self._http.get(self.api.content(addr))
+        res.raise_for_status()
+        data = await asyncio.to_thread(
+            zstandard.ZstdCompressor(level=3).compress, res.content
+        )
+        Client._content_store[addr] = data
+
+    async def _fetch_oauth(self, install: Servlet) -> dict:
+        res = await self._http.get(self.api.oauth(self.config.profile, install.name))
+        res.raise_for_status()
+        return orjson.loads(res.content)["oauth_info"]
+
+    async def plugin(
+        self,
+        install: Servlet,
+        cache: bool = True,
+        wasi: bool | None = None,
+        functions: List[ext.Function] | None = None,
+        wasm: List[Dict[str, bytes]] | None = None,
+    ) -> InstalledPlugin:
+        """
+        Instantiate an installed servlet, turning it into an InstalledPlugin
+
+        The Wasm content and OAuth token are fetched concurrently, and the
+        Extism plugin is created in a worker thread. Content is kept in the
+        same compressed store as `Client`, so it's only downloaded once per
+        process.
+        """
+        wasi = wasi or True
+        if cache and wasi and functions is None and wasm is None:
+            async with self._plugin_lock(install.name):
+                return await self._cached_plugin(install)
+        return await self._new_plugin(install, wasi, functions, wasm)
+
+    def _plugin_lock(self, name: str) -> asyncio.Lock:
+        lock = self._plugin_locks.get(name)
+        if lock is None:
+            lock = self._plugin_locks[name] = asyncio.Lock()
+        return lock
+
+    async def _cached_plugin(self, install: Servlet) -> InstalledPlugin:
+        """
+        Get or create the cached plugin for a servlet, the caller must hold
+        its lock
+        """
+        cached = self.plugin_cache.get(install.name)
+        if cached is not None and cached._install is not install:
+            # Built for a servlet that has since been replaced
+            cached = None
+        if cached is not None:
+            if cached._timestamp + timedelta(minutes=4, seconds=30) > datetime.now():
+                return cached
+            del self.plugin_cache[install.name]
+        p = await self._new_plugin(install, True, None, None)
+        self.plugin_cache[install.name] = p
+        return p
+
+    async def _new_plugin(
+        self,
+        install: Servlet,
+        wasi: bool,
+        functions: List[ext.Function] | None,
+        wasm: List[Dict[str, bytes]] | None,
+    ) -> InstalledPlugin:
+        async def nothing():
+            return None
+
+        fetch = (
+            install.content is None
+            and install.content_addr not in Client._content_store
+        )
+        _, oauth = await asyncio.gather(
+            self._fetch_content(install) if fetch else nothing(),
+            self._fetch_oauth(install) if install.has_oauth else nothing(),
+        )
+
+        def new_plugin():
+            data = install.content
+            if data is None:
+                data = zstandard.ZstdDecompressor().decompress(
+                    Client._content_store[install.content_addr]
+                )
+            manifest = _manifest(install, data, oauth, wasm)
+            return ext.Plugin(manifest, wasi=wasi, functions=functions or [])
+
+        plugin = await asyncio.to_thread(new_plugin)
+        return InstalledPlugin(install, plugin)
+
+    async def _resolve_tool(self, tool: str | Tool) -> Tool:
+        if isinstance(tool, Tool):
+            return tool
+        found_tool = await self.tool(tool)
+        if found_tool is None:
+            raise ValueError(f"Tool '{tool}' not found")
+        return found_tool
+
+    def _validate(self, tool: Tool, params: dict):
+        v = self._validators.get(tool.name)
+        if v is None:
+            v = self._validators[tool.name] = _compile_validator(tool, self.logger)
+        _validate_input(v, tool, params)
+
+    async def call_tool(
+        self,
+        tool: str | Tool,
+        params: dict | None = None,
+        *,
+        wasi: bool = True,
+        functions: List[ext.Function] | None = None,
+        wasm: List[Dict[str, bytes]] | None = None,
+    ) -> CallResult:
+        """
+        Call a tool with the given input parameters, see `Client.call_tool`
+        """
+        tool = await self._resolve_tool(tool)
+        params = params or {}
+        self._validate(tool, params)
+        if wasi and functions is None and wasm is None:
+            async with self._plugin_lock(tool.servlet.name):
+                plugin = await self._cached_plugin(tool.servlet)
+                return await asyncio.to_thread(
+                    plugin.call, tool=tool.name, input=params
+                )
+        plugin = await self._new_plugin(tool.servlet, wasi, functions, wasm)
+        return await asyncio.to_thread(plugin.call, tool=tool.name, input=params)
+
+    async def call_tool_many(
+        self, calls: Iterable[Tuple[str | Tool, dict | None]]
+    ) -> List[CallResult]:
+        """
+        Call several tools at once, returning results in the same order
+
+        Tool lookups share a single installs refresh, each servlet is
+        instantiated once and concurrently with the others, and calls
+        to different servlets run in parallel. Calls to the same servlet
+        run one after another, since a plugin instance isn't reentrant.
+        """
+        calls = [(tool, params or {}) for tool, params in calls]
+        tools = await asyncio.gather(*(self._resolve_tool(t) for t, _ in calls))
+        for tool, (_, params) in zip(tools, calls):
+            self._validate(tool, params)
+
+        servlets = {t.servlet.name: t.servlet for t in tools}
+        results: List[CallResult | None] = [None] * len(calls)
+
+        async def run(servlet: Servlet):
+            async with self._plugin_lock(servlet.name):
+                plugin = await self._cached_plugin(servlet)
+                for i, tool in enumerate(tools):
+                    if tool.servlet.name == servlet.name:
+                        results[i] = await asyncio.to_thread(
+                            plugin.call, tool=tool.name, input=calls[i][1]
+                        )
+
+        await asyncio.gather(*(run(s) for s in servlets.values()))
+        return results
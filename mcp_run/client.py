@@ -1,22 +1,38 @@
-from dataclasses import dataclass
-from typing import Iterator, Dict, List, TypedDict
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Dict, List, Tuple, TypedDict
+from concurrent.futures import ThreadPoolExecutor, Future
 from datetime import datetime, timedelta
 import logging
 import traceback
-import json
+import time
+import itertools
+import threading
 
 import requests
+import orjson
+import ijson
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 import extism as ext
+import fastjsonschema
+import zstandard
 
 from .api import Api
-from .types import Servlet, ServletSearchResult, CallResult, Tool, ProfileSlug
+from .types import (
+    Servlet,
+    ServletSearchResult,
+    CallResult,
+    Tool,
+    ProfileSlug,
+    _parse_timestamp,
+)
 from .profile import Profile
 from .task import Task, TaskRun
 from .plugin import InstalledPlugin
 from .config import ClientConfig, _default_session_id
 
 
-@dataclass
+@dataclass(slots=True)
 class UserEmail:
     """
     Represents an email address associated with a user account.
@@ -32,7 +48,7 @@ class UserEmail:
     verified: bool
 
 
-@dataclass
+@dataclass(slots=True)
 class User:
     """
     Represents an mcp.run user account.
@@ -44,32 +60,177 @@ class User:
 
     username: str
     emails: List[UserEmail]
+    _primary: UserEmail | None = field(init=False, repr=False, compare=False)
+    _verified: List[UserEmail] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._primary = next((e for e in self.emails if e.primary), None)
+        self._verified = [e for e in self.emails if e.verified]
 
     @property
     def primary_email(self) -> UserEmail | None:
         """Get the user's primary email address if one exists."""
-        return next((e for e in self.emails if e.primary), None)
+        return self._primary
 
     @property
     def verified_emails(self) -> List[UserEmail]:
         """Get all verified email addresses for this user."""
-        return [e for e in self.emails if e.verified]
+        return self._verified
+
+
+def _iter_json(res: requests.Response, prefix: str) -> Iterator[dict]:
+    """
+    Incrementally parse the items at `prefix` from a streamed response body
+    """
+    res.raw.decode_content = True
+    return ijson.items(res.raw, prefix, use_float=True)
+
+
+_ETAG_CACHE_SIZE = 64
+
+_TYPE_MAP = {
+    "string": str,
+    "boolean": bool,
+    "number": float,
+    "integer": int,
+    "object": dict,
+    "array": list,
+}
 
 
 def _convert_type(t):
-    if t == "string":
-        return str
-    elif t == "boolean":
-        return bool
-    elif t == "number":
-        return float
-    elif t == "integer":
-        return int
-    elif t == "object":
-        return dict
-    elif t == "array":
-        return list
-    raise TypeError(f"Unhandled conversion type: {t}")
+    try:
+        return _TYPE_MAP[t]
+    except (KeyError, TypeError):
+        raise TypeError(f"Unhandled conversion type: {t}") from None
+
+
+def _settings_fp(settings: dict) -> int:
+    return hash(orjson.dumps(settings, option=orjson.OPT_SORT_KEYS))
+
+
+def _unchanged(prior: Servlet | None, install: dict) -> bool:
+    """
+    Check whether an install from the API matches an already cached servlet
+    """
+    if prior is None:
+        return False
+    binding = install["binding"]
+    return (
+        prior.binding_id == binding["id"]
+        and prior.content_addr == binding["contentAddress"]
+        and prior._settings_fp == _settings_fp(install["settings"])
+    )
+
+
+def _servlet_from_json(install: dict) -> Servlet:
+    binding = install["binding"]
+    tools = install["servlet"]["meta"]["schema"]
+    if "tools" in tools:
+        tools = tools["tools"]
+    else:
+        tools = [tools]
+    servlet = Servlet(
+        binding_id=binding["id"],
+        content_addr=binding["contentAddress"],
+        name=install.get("name", ""),
+        slug=ProfileSlug.parse(install["servlet"]["slug"]),
+        settings=install["settings"],
+        tools={},
+        has_oauth=install["servlet"]["has_client"],
+        _settings_fp=_settings_fp(install["settings"]),
+    )
+    for tool in tools:
+        servlet.tools[tool["name"]] = Tool(
+            name=tool["name"],
+            description=tool["description"],
+            input_schema=tool["inputSchema"],
+            servlet=servlet,
+        )
+    return servlet
+
+
+def _search_result_from_json(servlet: dict) -> ServletSearchResult:
+    return ServletSearchResult(
+        slug=ProfileSlug.parse(servlet["slug"]),
+        meta=servlet.get("meta", {}),
+        installation_count=servlet["installation_count"],
+        visibility=servlet["visibility"],
+        created_at=_parse_timestamp(servlet["created_at"]),
+        modified_at=_parse_timestamp(servlet["modified_at"]),
+    )
+
+
+def _manifest(
+    install: Servlet,
+    data: bytes,
+    oauth: dict | None,
+    wasm: List[Dict[str, bytes]] | None,
+) -> dict:
+    perm = install.settings["permissions"]
+    wasm_modules = [{"data": data}]
+    if wasm is not None:
+        wasm_modules.extend(wasm)
+    manifest = {
+        "wasm": wasm_modules,
+        "allowed_paths": perm["filesystem"].get("volumes", {}),
+        "allowed_hosts": perm["network"].get("domains", []),
+        "config": dict(install.settings.get("config", {})),
+    }
+
+    if oauth is not None:
+        manifest["config"][oauth["config_name"]] = oauth["access_token"]
+    return manifest
+
+
+def _no_validation(params: dict):
+    return params
+
+
+def _refuse_remote_ref(uri: str):
+    raise fastjsonschema.JsonSchemaDefinitionException(
+        f"Remote $ref is not resolved: {uri}"
+    )
+
+
+class _NoRemoteRefs(dict):
+    """
+    fastjsonschema ref handlers that refuse every URI scheme, so a servlet's
+    schema can't make the client fetch arbitrary URLs
+    """
+
+    def __contains__(self, scheme) -> bool:
+        return True
+
+    def __getitem__(self, scheme):
+        return _refuse_remote_ref
+
+
+def _compile_validator(tool: Tool, logger: logging.Logger) -> Callable[[dict], object]:
+    """
+    Compile a tool's input schema, without filling in defaults so the
+    validated params are left untouched
+
+    Validation is skipped for schemas that can't be compiled (remote refs,
+    patterns Python's re doesn't support, ...), since the servlet itself
+    still accepts them
+    """
+    try:
+        return fastjsonschema.compile(
+            tool.input_schema, handlers=_NoRemoteRefs(), use_default=False
+        )
+    except Exception as exc:
+        logger.debug(f"Not validating input to {tool.name}: {exc!r}")
+        return _no_validation
+
+
+def _validate_input(validate: Callable[[dict], object], tool: Tool, params: dict):
+    try:
+        validate(params)
+    except fastjsonschema.JsonSchemaValueException as exc:
+        raise ValueError(
+            f"Invalid input for tool '{tool.name}': {exc.message}"
+        ) from exc
 
 
 class Client:
@@ -136,6 +297,100 @@ class Client:
     Date header from last installations request
     """
 
+    _profile_installs: Dict[str, List[Servlet]]
+    """
+    Servlets from the last installations response, keyed by profile
+    """
+
+    _http: requests.Session
+    """
+    HTTP session, reused across requests for connection pooling
+    """
+
+    _pool: ThreadPoolExecutor
+    """
+    Thread pool used to issue independent requests concurrently
+    """
+
+    _prefetch_pool: ThreadPoolExecutor
+    """
+    Speculative Wasm downloads, kept apart from _pool so requests made on
+    demand don't queue behind them
+    """
+
+    _warm_pool: ThreadPoolExecutor
+    """
+    Background instantiation of plugins, kept apart from _pool since
+    warm-ups wait on content downloads running there
+    """
+
+    _plugin_locks: Dict[str, threading.Lock]
+    """
+    Per-servlet locks guarding plugin_cache population
+    """
+
+    _content_futures: Dict[str, Future]
+    """
+    Pending or completed Wasm downloads, keyed by content address
+    """
+
+    _content_store: Dict[str, bytes] = {}
+    """
+    zstd-compressed Wasm modules keyed by content address, shared by all
+    clients in the process
+    """
+
+    _tools_index: Dict[str, Tool]
+    """
+    Tools from install_cache, keyed by tool name
+    """
+
+    _tools_index_ts: float | None
+    """
+    Monotonic time of the last installs refresh for the current profile
+    """
+
+    _fn_cache: Dict[str, Tuple[Tool, Callable]]
+    """
+    Tool wrappers built by _make_pydantic_function and the Tool each was
+    built for, keyed by tool name
+    """
+
+    _etag_cache: Dict[str, Tuple[str, List[dict]]]
+    """
+    ETag and parsed items of the last response from each list endpoint
+    """
+
+    _profile_prefetch: Tuple[List[Profile], List[Profile]] | None
+    """
+    User and public profiles from the last concurrent profile fetch
+    """
+
+    _profiles_cache: Dict[str, Dict[str, Profile]] | None
+    """
+    Result of the profiles property, built from _profile_prefetch
+    """
+
+    _profiles_ts: float | None
+    """
+    Monotonic time _profile_prefetch was fetched
+    """
+
+    _validators: Dict[str, Callable[[dict], object]]
+    """
+    Compiled input schema validators, keyed by tool name
+    """
+
+    _inflight: Dict[str, Future]
+    """
+    In-flight installs requests, keyed by profile
+    """
+
+    _inflight_lock: threading.Lock
+    """
+    Guards _inflight
+    """
+
     _user: User | None = None
 
     def __init__(
@@ -152,32 +407,87 @@ class Client:
             config = ClientConfig(*args, **kw)
         self.session_id = session_id
         self.api = Api(config.base_url)
+        self._http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.2,
+                status_forcelist=(502, 503, 504),
+                raise_on_status=False,
+            ),
+        )
+        self._http.mount("http://", adapter)
+        self._http.mount("https://", adapter)
+        self._http.cookies.set("sessionId", session_id)
+        self._pool = ThreadPoolExecutor(max_workers=8)
+        self._prefetch_pool = ThreadPoolExecutor(max_workers=4)
+        self._warm_pool = ThreadPoolExecutor(max_workers=2)
+        self._plugin_locks = {}
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
         self.install_cache = {}
         self.plugin_cache = {}
         self.logger = config.logger
         self.config = config
         self._user = None
         self.last_installations_request = {}
+        self._profile_installs = {}
+        self._content_futures = {}
+        self._tools_index = {}
+        self._tools_index_ts = None
+        self._fn_cache = {}
+        self._validators = {}
+        self._etag_cache = {}
+        self._profile_prefetch = None
+        self._profiles_cache = None
+        self._profiles_ts = None
 
         if log_level is not None:
             self.configure_logging(level=log_level)
 
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Cancel queued background work and close the underlying HTTP connections
+        """
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._prefetch_pool.shutdown(wait=False, cancel_futures=True)
+        self._warm_pool.shutdown(wait=False, cancel_futures=True)
+        self._http.close()
+
     def _fix_profile(
         self, profile: str | ProfileSlug | Profile | None, user=False
     ) -> ProfileSlug:
-        if user:
-            return self._fix_profile(profile, user=False)._current_user(
-                self.user.username
-            )
-        if profile is None:
-            return ProfileSlug.parse(self.config.profile) or ProfileSlug("~", "default")
+        if isinstance(profile, ProfileSlug):
+            slug = profile
         elif isinstance(profile, Profile):
-            return ProfileSlug.parse(profile.slug)
-        elif isinstance(profile, str):
-            return ProfileSlug.parse(profile)
-        return ProfileSlug.parse(profile)
+            slug = profile.slug
+            if not isinstance(slug, ProfileSlug):
+                slug = ProfileSlug.parse(slug)
+        elif profile is None:
+            slug = self.config.profile
+            if not slug:
+                slug = ProfileSlug("~", "default")
+            elif not isinstance(slug, ProfileSlug):
+                # Parse once and keep the result on the config
+                slug = self.config.profile = ProfileSlug.parse(slug)
+        else:
+            slug = ProfileSlug.parse(profile)
+        if user:
+            return slug._current_user(self.user.username)
+        return slug
 
     def _make_pydantic_function(self, tool: Tool):
+        cached = self._fn_cache.get(tool.name)
+        if cached is not None and cached[0] is tool:
+            return cached[1]
         props = tool.input_schema["properties"]
         t = {k: _convert_type(v["type"]) for k, v in props.items()}
         InputType = TypedDict("Input", t)
@@ -185,17 +495,19 @@ class Client:
         def f(input: InputType):
             try:
                 res = self.call_tool(tool=tool.name, params=input)
-                out = ""
+                parts: List[str] = []
                 for t in res.content:
                     if hasattr(t, "text"):
-                        out += t.text
+                        parts.append(t.text)
                     else:
-                        out += json.dumps(t)
-                    out += "\n"
-                return out
+                        parts.append(orjson.dumps(t).decode())
+                    parts.append("\n")
+                return "".join(parts)
             except Exception as exc:
                 return f"ERROR call to tool {tool.name} failed: {traceback.format_exception(exc)}"
 
+        # Replaces any wrapper for an older version of the tool
+        self._fn_cache[tool.name] = (tool, f)
         return f
 
     def configure_logging(self, *args, **kw):
@@ -206,8 +518,80 @@ class Client:
 
     def clear_cache(self):
         self.last_installations_request = {}
+        self._profile_installs = {}
         self.install_cache = {}
         self.plugin_cache = {}
+        self._content_futures = {}
+        self._tools_index = {}
+        self._tools_index_ts = None
+        self._fn_cache = {}
+        self._validators = {}
+        self._profiles_ts = None
+
+    def _get_items(self, url: str) -> Iterator[dict]:
+        """
+        Stream the items of a JSON list endpoint, revalidating with the
+        last ETag so an unchanged list is served from memory
+        """
+        headers = {"Accept": "application/json"}
+        cached = self._etag_cache.get(url)
+        if cached is not None:
+            headers["If-None-Match"] = cached[0]
+        with self._http.get(url, headers=headers, stream=True) as res:
+            res.raise_for_status()
+            if res.status_code == 304 and cached is not None:
+                self.logger.debug(f"No changes to {url}")
+                yield from cached[1]
+                return
+            etag = res.headers.get("ETag")
+            items = []
+            for item in _iter_json(res, "item"):
+                if etag is not None:
+                    items.append(item)
+                yield item
+        if etag is not None:
+            if len(self._etag_cache) >= _ETAG_CACHE_SIZE:
+                self._etag_cache.clear()
+            self._etag_cache[url] = (etag, items)
+
+    def _index_tools(self, profile: ProfileSlug):
+        self._tools_index = {
+            tool.name: tool
+            for install in self.install_cache.values()
+            for tool in install.tools.values()
+        }
+        if profile == self._fix_profile(None):
+            self._tools_index_ts = time.monotonic()
+
+    def _fetch_content(self, addr: str):
+        self.logger.info(f"Fetching servlet Wasm {addr}")
+        res = self._http.get(self.api.content(addr))
+        res.raise_for_status()
+        data = zstandard.ZstdCompressor(level=3).compress(res.content)
+        Client._content_store[addr] = data
+
+    def _content_future(self, addr: str, prefetch: bool = False) -> Future | None:
+        """
+        Get the download for a content address, starting it if needed,
+        returns None if the content is already stored
+
+        Prefetches run on _prefetch_pool; a download needed now takes over
+        a prefetch of the same content that hasn't started yet
+        """
+        if addr in Client._content_store:
+            return None
+        fut = self._content_futures.get(addr)
+        if fut is not None and not prefetch and fut.cancel():
+            self.logger.debug(f"Fetching {addr} ahead of queued prefetches")
+        if (
+            fut is None
+            or fut.cancelled()
+            or (fut.done() and fut.exception() is not None)
+        ):
+            pool = self._prefetch_pool if prefetch else self._pool
+            fut = pool.submit(self._fetch_content, addr)
+            self._content_futures[addr] = fut
+        return fut
 
     @property
     def user(self) -> User:
@@ -217,9 +601,9 @@ class Client:
         if self._user is not None:
             return self._user
         url = self.api.current_user()
-        res = requests.get(url, cookies={"sessionId": self.session_id})
+        res = self._http.get(url)
         res.raise_for_status()
-        data = res.json()
+        data = orjson.loads(res.content)
         self._user = User(
             username=data["username"],
             emails=[
@@ -282,9 +666,11 @@ class Client:
             "provider": provider,
             "prompt": prompt,
         }
-        res = requests.put(url, cookies={"sessionId": self.session_id}, json=data)
+        res = self._http.put(
+            url, data=orjson.dumps(data), headers={"Content-Type": "application/json"}
+        )
         res.raise_for_status()
-        data = res.json()
+        data = orjson.loads(res.content)
         return Task(
             _client=self,
             name=data["name"],
@@ -292,8 +678,8 @@ class Client:
             provider=data["provider"],
             settings=data.get("settings", {}),
             prompt=prompt,
-            created_at=datetime.fromisoformat(data["created_at"]),
-            modified_at=datetime.fromisoformat(data["modified_at"]),
+            created_at=_parse_timestamp(data["created_at"]),
+            modified_at=_parse_timestamp(data["modified_at"]),
         )
 
     def create_profile(
@@ -309,16 +695,21 @@ class Client:
         params = {"description": description, "is_public": is_public}
         url = self.api.create_profile(profile=ProfileSlug("~", name))
         self.logger.info(f"Creating profile {name} {url}")
-        res = requests.post(url, cookies={"sessionId": self.session_id}, json=params)
+        res = self._http.post(
+            url,
+            data=orjson.dumps(params),
+            headers={"Content-Type": "application/json"},
+        )
         res.raise_for_status()
-        data = res.json()
+        self._profiles_ts = None
+        data = orjson.loads(res.content)
         p = Profile(
             _client=self,
             slug=ProfileSlug("~", name),
             description=data["description"],
             is_public=data["is_public"],
-            created_at=datetime.fromisoformat(data["created_at"]),
-            modified_at=datetime.fromisoformat(data["modified_at"]),
+            created_at=_parse_timestamp(data["created_at"]),
+            modified_at=_parse_timestamp(data["modified_at"]),
         )
         if set_current:
             self.set_profile(name)
@@ -330,17 +721,14 @@ class Client:
         """
         url = self.api.profiles()
         self.logger.info(f"Listing mcp.run profiles from {url}")
-        res = requests.get(url, cookies={"sessionId": self.session_id})
-        res.raise_for_status()
-        data = res.json()
-        for p in data:
+        for p in self._get_items(url):
             profile = Profile(
                 _client=self,
                 slug=ProfileSlug.parse(p["slug"]),
                 description=p["description"],
                 is_public=p["is_public"],
-                created_at=datetime.fromisoformat(p["created_at"]),
-                modified_at=datetime.fromisoformat(p["modified_at"]),
+                created_at=_parse_timestamp(p["created_at"]),
+                modified_at=_parse_timestamp(p["modified_at"]),
             )
             yield profile
 
@@ -350,17 +738,14 @@ class Client:
         """
         url = self.api.public_profiles()
         self.logger.info(f"Listing mcp.run public profiles from {url}")
-        res = requests.get(url, cookies={"sessionId": self.session_id})
-        res.raise_for_status()
-        data = res.json()
-        for p in data:
+        for p in self._get_items(url):
             profile = Profile(
                 _client=self,
                 slug=ProfileSlug.parse(p["slug"]),
                 description=p["description"],
                 is_public=p["is_public"],
-                created_at=datetime.fromisoformat(p["created_at"]),
-                modified_at=datetime.fromisoformat(p["modified_at"]),
+                created_at=_parse_timestamp(p["created_at"]),
+                modified_at=_parse_timestamp(p["modified_at"]),
             )
             yield profile
 
@@ -368,10 +753,28 @@ class Client:
         """
         List all public and user profiles
         """
-        for profile in self.list_user_profiles():
-            yield profile
-        for profile in self.list_public_profiles():
-            yield profile
+        user, public = self._prefetch_profiles()
+        yield from user
+        yield from public
+
+    def _prefetch_profiles(self) -> Tuple[List[Profile], List[Profile]]:
+        """
+        Fetch user and public profiles concurrently, reusing the last
+        result until the profile refresh time has passed
+        """
+        ts = self._profiles_ts
+        if (
+            self._profile_prefetch is not None
+            and ts is not None
+            and time.monotonic() - ts < self.config.profile_refresh_time.total_seconds()
+        ):
+            return self._profile_prefetch
+        user = self._pool.submit(lambda: list(self.list_user_profiles()))
+        public = self._pool.submit(lambda: list(self.list_public_profiles()))
+        self._profile_prefetch = (user.result(), public.result())
+        self._profiles_cache = None
+        self._profiles_ts = time.monotonic()
+        return self._profile_prefetch
 
     def list_tasks(
         self, profile: Profile | ProfileSlug | str | None = None
@@ -382,10 +785,7 @@ class Client:
         profile = self._fix_profile(profile, user=True)
         url = self.api.tasks()
         self.logger.info(f"Listing mcp.run tasks from {url}")
-        res = requests.get(url, cookies={"sessionId": self.session_id})
-        res.raise_for_status()
-        data = res.json()
-        for t in data:
+        for t in self._get_items(url):
             task = Task(
                 _client=self,
                 name=t["name"],
@@ -393,8 +793,8 @@ class Client:
                 provider=t["provider"],
                 settings=t.get("settings", {}),
                 prompt=t["prompt"],
-                created_at=datetime.fromisoformat(t["created_at"]),
-                modified_at=datetime.fromisoformat(t["modified_at"]),
+                created_at=_parse_timestamp(t["created_at"]),
+                modified_at=_parse_timestamp(t["modified_at"]),
             )
             if task.profile != str(profile):
                 continue
@@ -411,18 +811,15 @@ class Client:
             task = self.tasks[task]
         url = self.api.task_runs(profile, task.name)
         self.logger.info(f"Listing mcp.run task runs from {url}")
-        res = requests.get(url, cookies={"sessionId": self.session_id})
-        res.raise_for_status()
-        data = res.json()
-        for t in data:
+        for t in self._get_items(url):
             run = TaskRun(
                 _client=self,
                 _task=task,
                 name=t["name"],
                 status=t["status"],
                 results_list=t["results"],
-                created_at=datetime.fromisoformat(t["created_at"]),
-                modified_at=datetime.fromisoformat(t["modified_at"]),
+                created_at=_parse_timestamp(t["created_at"]),
+                modified_at=_parse_timestamp(t["modified_at"]),
             )
             if run._task.profile != profile:
                 continue
@@ -443,16 +840,15 @@ class Client:
         """
         Get all profiles, including public profiles, keyed by user and profile name
         """
+        user_profiles, public_profiles = self._prefetch_profiles()
+        if self._profiles_cache is not None:
+            return self._profiles_cache
         p = {}
-        for profile in self.list_user_profiles():
-            if profile.slug.user not in p:
-                p[profile.slug.user] = {}
-            p[profile.slug.user][profile.slug.name] = profile
-            p["~"] = p[profile.slug.user]
-        for profile in self.list_public_profiles():
-            if profile.slug.user not in p:
-                p[profile.slug.user] = {}
-            p[profile.slug.user][profile.slug.name] = profile
+        for profile in itertools.chain(user_profiles, public_profiles):
+            p.setdefault(profile.slug.user, {})[profile.slug.name] = profile
+        if user_profiles:
+            p["~"] = p[user_profiles[0].slug.user]
+        self._profiles_cache = p
         return p
 
     def list_installs(
@@ -462,57 +858,75 @@ class Client:
         """
         List all installed servlets, this will make an HTTP
         request each time
+
+        Concurrent calls for the same profile share a single request
         """
         profile = self._fix_profile(profile)
+        key = str(profile)
+        with self._inflight_lock:
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._inflight[key] = fut
+        if leader:
+            try:
+                fut.set_result(self._refresh_installs(profile))
+            except BaseException as exc:
+                fut.set_exception(exc)
+            finally:
+                with self._inflight_lock:
+                    del self._inflight[key]
+        else:
+            self.logger.debug(f"Waiting on in-flight installs request for {key}")
+        yield from fut.result()
+
+    def _refresh_installs(self, profile: ProfileSlug) -> List[Servlet]:
         url = self.api.installations(profile)
         self.logger.info(f"Listing installed mcp.run servlets from {url}")
         headers = {}
         last = self.last_installations_request.get(profile)
-        if last is not None:
+        prior_installs = self._profile_installs.get(profile)
+        if last is not None and prior_installs is not None:
             headers["if-modified-since"] = last
-        res = requests.get(
-            url,
-            headers=headers,
-            cookies={
-                "sessionId": self.session_id,
-            },
-        )
-        res.raise_for_status()
-        if res.status_code == 301:
-            self.logger.debug(f"No changes since {last}")
-            for v in self.install_cache.values():
-                yield v
-            return
-        data = res.json()
-        self.logger.debug(f"Got installed servlets from {url}: {data}")
-        self.last_installations_request[profile] = res.headers.get("Date")
-        for install in data["installs"]:
-            binding = install["binding"]
-            tools = install["servlet"]["meta"]["schema"]
-            if "tools" in tools:
-                tools = tools["tools"]
-            else:
-                tools = [tools]
-            install = Servlet(
-                binding_id=binding["id"],
-                content_addr=binding["contentAddress"],
-                name=install.get("name", ""),
-                slug=ProfileSlug.parse(install["servlet"]["slug"]),
-                settings=install["settings"],
-                tools={},
-                has_oauth=install["servlet"]["has_client"],
-            )
-            for tool in tools:
-                install.tools[tool["name"]] = Tool(
-                    name=tool["name"],
-                    description=tool["description"],
-                    input_schema=tool["inputSchema"],
-                    servlet=install,
-                )
-            self.install_cache[install.name] = install
-            if install.name in self.plugin_cache:
-                del self.plugin_cache[install.name]
-            yield install
+        installs = []
+        with self._http.get(url, headers=headers, stream=True) as res:
+            res.raise_for_status()
+            if res.status_code == 304:
+                self.logger.debug(f"No changes since {last}")
+                self._index_tools(profile)
+                return list(prior_installs)
+            self.logger.debug(f"Got installed servlets from {url}")
+            self.last_installations_request[profile] = res.headers.get("Date")
+            prefetch = self.config.prefetch_limit if self.config.prefetch_content else 0
+            warm = 0
+            if self.config.warm_plugins and profile == self._fix_profile(None):
+                warm = self.config.prefetch_limit
+            for install in _iter_json(res, "installs.item"):
+                prior = self.install_cache.get(install.get("name", ""))
+                if _unchanged(prior, install):
+                    # Keep the cached servlet, its content and its plugin
+                    install = prior
+                else:
+                    if prior is not None:
+                        for name in prior.tools:
+                            self._validators.pop(name, None)
+                            self._fn_cache.pop(name, None)
+                    install = _servlet_from_json(install)
+                    self.install_cache[install.name] = install
+                    with self._plugin_lock(install.name):
+                        self.plugin_cache.pop(install.name, None)
+                if prefetch > 0 and install.content is None:
+                    addr = install.content_addr
+                    if self._content_future(addr, prefetch=True) is not None:
+                        prefetch -= 1
+                if warm > 0 and install.name not in self.plugin_cache:
+                    self._warm_pool.submit(self._warm_plugin, install)
+                    warm -= 1
+                installs.append(install)
+        self._profile_installs[profile] = installs
+        self._index_tools(profile)
+        return list(installs)
 
     @property
     def installs(self) -> Dict[str, Servlet]:
@@ -520,6 +934,18 @@ class Client:
         Get all installed servlets, this will returned cached Installs if
         the cache timeout hasn't been reached
         """
+        return self._ensure_installs()
+
+    def _ensure_installs(self) -> Dict[str, Servlet]:
+        """
+        Refresh install_cache and the tools index if they're out of date
+        """
+        ts = self._tools_index_ts
+        if (
+            ts is not None
+            and time.monotonic() - ts < self.config.tool_refresh_time.total_seconds()
+        ):
+            return self.install_cache
         for install in self.list_installs():
             continue
         return self.install_cache
@@ -534,12 +960,7 @@ class Client:
         if isinstance(servlet, Servlet):
             servlet = servlet.name
         url = self.api.uninstall(profile_name, servlet)
-        res = requests.delete(
-            url,
-            cookies={
-                "sessionId": self.session_id,
-            },
-        )
+        res = self._http.delete(url)
         res.raise_for_status()
         if profile is None:
             self.clear_cache()
@@ -575,12 +996,10 @@ class Client:
         if name is not None:
             params["name"] = name
         url = self.api.install(profile_name)
-        res = requests.post(
+        res = self._http.post(
             url,
-            json=params,
-            cookies={
-                "sessionId": self.session_id,
-            },
+            data=orjson.dumps(params),
+            headers={"Content-Type": "application/json"},
         )
         res.raise_for_status()
         if profile is None:
@@ -591,44 +1010,23 @@ class Client:
         """
         Get all tools from all installed servlets
         """
-        installs = self.installs
-        tools = {}
-        for install in installs.values():
-            for tool in install.tools.values():
-                tools[tool.name] = tool
-        return tools
+        self._ensure_installs()
+        return dict(self._tools_index)
 
     def tool(self, name: str) -> Tool | None:
         """
         Get a tool by name
         """
-        for install in self.installs.values():
-            for tool in install.tools.values():
-                if tool.name == name:
-                    return tool
-        return None
+        self._ensure_installs()
+        return self._tools_index.get(name)
 
     def search(self, query: str) -> Iterator[ServletSearchResult]:
         """
         Search for tools on mcp.run
         """
         url = self.api.search(query)
-        res = requests.get(
-            url,
-            cookies={
-                "sessionId": self.session_id,
-            },
-        )
-        data = res.json()
-        for servlet in data:
-            yield ServletSearchResult(
-                slug=ProfileSlug.parse(servlet["slug"]),
-                meta=servlet.get("meta", {}),
-                installation_count=servlet["installation_count"],
-                visibility=servlet["visibility"],
-                created_at=datetime.fromisoformat(servlet["created_at"]),
-                modified_at=datetime.fromisoformat(servlet["modified_at"]),
-            )
+        for servlet in self._get_items(url):
+            yield _search_result_from_json(servlet)
 
     def plugin(
         self,
@@ -650,21 +1048,18 @@ class Client:
         Returns:
             An InstalledPlugin instance
         """
-        if install.has_oauth:
-            res = requests.get(
-                self.api.oauth(self.config.profile, install.name),
-                cookies={
-                    "sessionId": self.session_id,
-                },
-            )
-            res.raise_for_status()
-            oauth = res.json()["oauth_info"]
-        else:
-            oauth = None
         wasi = wasi or True
         cache_ok = cache and wasi and functions is None and wasm is None
-        if cache_ok:
+        if not cache_ok:
+            return self._new_plugin(install, wasi, functions, wasm)
+        # Serialize per servlet so a background warm-up and a call don't
+        # both instantiate the same plugin
+        with self._plugin_lock(install.name):
             cached: InstalledPlugin | None = self.plugin_cache.get(install.name)
+            if cached is not None and cached._install is not install:
+                # Built for a servlet that has since been replaced
+                self.logger.info(f"Found cached {install.name} for an older install")
+                cached = None
             if cached is not None:
                 if (
                     cached._timestamp + timedelta(minutes=4, seconds=30)
@@ -677,39 +1072,52 @@ class Client:
                         f"Found cached {install.name}, but oauth token update is needed"
                     )
                     del self.plugin_cache[install.name]
-        if install.content is None:
-            self.logger.info(
-                f"Fetching servlet Wasm for {install.name}: {install.content_addr}"
-            )
-            res = requests.get(
-                self.api.content(install.content_addr),
-                cookies={
-                    "sessionId": self.session_id,
-                },
-            )
-            install.content = res.content
-        perm = install.settings["permissions"]
-        wasm_modules = [{"data": install.content}]
-        if wasm is not None:
-            wasm_modules.extend(wasm)
-        manifest = {
-            "wasm": wasm_modules,
-            "allowed_paths": perm["filesystem"].get("volumes", {}),
-            "allowed_hosts": perm["network"].get("domains", []),
-            "config": install.settings.get("config", {}),
-        }
+            p = self._new_plugin(install, wasi, functions, wasm)
+            self.plugin_cache[install.name] = p
+            return p
 
-        if oauth is not None:
-            manifest["config"][oauth["config_name"]] = oauth["access_token"]
+    def _plugin_lock(self, name: str) -> threading.Lock:
+        return self._plugin_locks.setdefault(name, threading.Lock())
 
+    def _new_plugin(
+        self,
+        install: Servlet,
+        wasi: bool,
+        functions: List[ext.Function] | None,
+        wasm: List[Dict[str, bytes]] | None,
+    ) -> InstalledPlugin:
+        content = None
+        if install.content is None:
+            content = self._content_future(install.content_addr)
+        if install.has_oauth:
+            res = self._http.get(self.api.oauth(self.config.profile, install.name))
+            res.raise_for_status()
+            oauth = orjson.loads(res.content)["oauth_info"]
+        else:
+            oauth = None
+        if content is not None:
+            content.result()
+        if install.content is not None:
+            data = install.content
+        else:
+            data = zstandard.ZstdDecompressor().decompress(
+                Client._content_store[install.content_addr]
+            )
+        manifest = _manifest(install, data, oauth, wasm)
         if functions is None:
             functions = []
-        p = InstalledPlugin(
+        return InstalledPlugin(
             install, ext.Plugin(manifest, wasi=wasi, functions=functions)
         )
-        if cache_ok:
-            self.plugin_cache[install.name] = p
-        return p
+
+    def _warm_plugin(self, install: Servlet):
+        try:
+            self.plugin(install)
+        except RuntimeError as exc:
+            # The pools were shut down by close() or at interpreter exit
+            self.logger.debug(f"Skipped warming up {install.name}: {exc}")
+        except Exception as exc:
+            self.logger.warning(f"Unable to warm up {install.name}: {exc}")
 
     def call_tool(
         self,
@@ -759,8 +1167,20 @@ class Client:
             if found_tool is None:
                 raise ValueError(f"Tool '{tool}' not found")
             tool = found_tool
+        params = params or {}
+        _validate_input(self._validator(tool), tool, params)
         plugin = self.plugin(tool.servlet, wasi=wasi, functions=functions, wasm=wasm)
-        return plugin.call(tool=tool.name, input=params or {})
+        return plugin.call(tool=tool.name, input=params)
+
+    def _validator(self, tool: Tool) -> Callable[[dict], object]:
+        """
+        Get the compiled input schema validator for a tool
+        """
+        v = self._validators.get(tool.name)
+        if v is None:
+            v = _compile_validator(tool, self.logger)
+            self._validators[tool.name] = v
+        return v
 
     def delete_profile(self, profile: str | Profile | ProfileSlug):
         """
@@ -768,10 +1188,6 @@ class Client:
         """
         profile = self._fix_profile(profile, user=True)
         url = self.api.delete_profile(profile)
-        res = requests.delete(
-            url,
-            cookies={
-                "sessionId": self.session_id,
-            },
-        )
+        res = self._http.delete(url)
         res.raise_for_status()
+        self._profiles_ts = None
@@ -77,6 +77,28 @@ class ClientConfig:
     mcp.run profile name
     """
 
+    prefetch_content: bool = True
+    """
+    Download servlet Wasm in the background when listing installs
+    """
+
+    prefetch_limit: int = 16
+    """
+    Maximum number of servlets to prefetch Wasm for each time installs are listed
+    """
+
+    warm_plugins: bool = True
+    """
+    Instantiate servlet plugins in the background when listing installs for
+    the configured profile, at most prefetch_limit at a time
+    """
+
+    profile_refresh_time: timedelta = timedelta(seconds=30)
+    """
+    Length of time to reuse fetched profiles in Client.profiles and
+    Client.list_profiles
+    """
+
     def configure_logging(self, *args, **kw):
         """
         Configure logging using logging.basicConfig
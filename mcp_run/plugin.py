@@ -1,5 +1,5 @@
 import base64
-import json
+import orjson
 import extism as ext
 
 from datetime import datetime
@@ -22,9 +22,9 @@ class InstalledPlugin:
         """
         if tool is None:
             tool = self._install.name
-        j = json.dumps({"params": {"arguments": input, "name": tool}})
+        j = orjson.dumps({"params": {"arguments": input, "name": tool}})
         r = self._plugin.call("call", j)
-        r = json.loads(r)
+        r = orjson.loads(r)
 
         out = []
         for c in r["content"]:
@@ -9,7 +9,7 @@ if TYPE_CHECKING:
     from .client import Client
 
 
-@dataclass
+@dataclass(slots=True)
 class Profile:
     """
     mcp.run profile
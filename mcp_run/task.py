@@ -4,19 +4,20 @@ from typing import List, TYPE_CHECKING, Iterator
 from datetime import datetime, timedelta
 from time import sleep
 
-from .types import ProfileSlug
+from .types import ProfileSlug, _parse_timestamp
 
 if TYPE_CHECKING:
     from .client import Client
 
 import requests
+import orjson
 
 
 class TaskRunError(Exception):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class TaskRun:
     """
     mcp.run task run
@@ -39,13 +40,12 @@ class TaskRun:
             raise TaskRunError("No task URL set")
         done = False
         while not done:
-            res = requests.get(
+            res = self._client._http.get(
                 self.url,
-                cookies={"sessionId": self._client.session_id},
                 timeout=timeout.total_seconds() if timeout is not None else None,
             )
             res.raise_for_status()
-            data = res.json()
+            data = orjson.loads(res.content)
             if data["status"] == "running":
                 n = datetime.now() - start
                 if timeout is not None and (n > timeout or n + interval > timeout):
@@ -71,7 +71,7 @@ class TaskRun:
         return r
 
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     """
     mcp.run task
@@ -122,9 +122,9 @@ class Task:
         """
         url = self._client.api.task_signed_url(self.profile, self.name)
         self._client.logger.info(f"Creating signed url for {self.task_slug}")
-        res = requests.post(url, cookies={"sessionId": self._client.session_id})
+        res = self._client._http.post(url)
         res.raise_for_status()
-        data = res.json()
+        data = orjson.loads(res.content)
         return data["url"]
 
     def list_runs(self) -> Iterator[TaskRun]:
@@ -150,26 +150,26 @@ class Task:
             data = {}
 
         # Setup request headers
-        headers = {}
+        headers = {"Content-Type": "application/json"}
         if run_id is not None:
             headers["run-id"] = run_id
 
         # Send call to signed url
-        res = requests.post(signed_url, headers=headers, json=data)
+        res = requests.post(signed_url, headers=headers, data=orjson.dumps(data))
         res.raise_for_status()
-        url = res.json()["url"]
+        url = orjson.loads(res.content)["url"]
 
         # Get task run details
-        res = requests.get(url, cookies={"sessionId": self._client.session_id})
+        res = self._client._http.get(url)
         res.raise_for_status()
-        data = res.json()
+        data = orjson.loads(res.content)
         return TaskRun(
             _client=self._client,
             _task=self,
             name=data["name"],
             status=data["status"],
             results_list=data.get("results", []),
-            created_at=datetime.fromisoformat(data["created_at"]),
-            modified_at=datetime.fromisoformat(data["modified_at"]),
+            created_at=_parse_timestamp(data["created_at"]),
+            modified_at=_parse_timestamp(data["modified_at"]),
             url=url,
         )
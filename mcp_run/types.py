@@ -3,7 +3,19 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional, Dict, List
 from datetime import datetime
-import json
+import functools
+import orjson
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_timestamp(s: str) -> datetime:
+    """
+    Parse an ISO 8601 timestamp
+
+    Rows in a listing often share timestamps and datetimes are immutable,
+    so parsed values are cached and shared.
+    """
+    return datetime.fromisoformat(s)
 
 
 class MCPRunError(Exception):
@@ -78,7 +90,7 @@ class ProfileSlug(str):
         return ProfileSlug(user, self.name)
 
 
-@dataclass
+@dataclass(slots=True)
 class Tool:
     """
     Represents a callable tool provided by a servlet.
@@ -109,7 +121,7 @@ class Tool:
         return f"{self.servlet.name}.{self.name}" if self.servlet else self.name
 
 
-@dataclass
+@dataclass(slots=True)
 class Servlet:
     """
     An installed mcp.run servlet
@@ -152,6 +164,11 @@ class Servlet:
 
     has_oauth: bool = False
 
+    _settings_fp: int | None = None
+    """
+    Hash of the settings this servlet was installed with
+    """
+
     def __eq__(self, other):
         if other is None:
             return False
@@ -166,7 +183,7 @@ class Servlet:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class ServletSearchResult:
     """
     Details about a servlet from the search endpoint
@@ -236,7 +253,7 @@ class Content:
         """
         Get the result data as json
         """
-        return json.loads(self.text)
+        return orjson.loads(self.data)
 
     @property
     def data(self):
@@ -1,7 +1,84 @@
-from mcp_run import Client, ClientConfig, ProfileSlug
+from mcp_run import Client, AsyncClient, ClientConfig, ProfileSlug
+from mcp_run.client import User, UserEmail
+from mcp_run.api import Api
 
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import extism as ext
+import httpx
+import zstandard
 import unittest
+import logging
+import asyncio
+import orjson
+import io
 import os
+import time
+import threading
+
+
+def mock_install(name: str, addr: str = "addr1") -> dict:
+    return {
+        "name": name,
+        "binding": {"id": f"binding-{name}", "contentAddress": addr},
+        "settings": {
+            "permissions": {"filesystem": {}, "network": {}},
+            "config": {},
+        },
+        "servlet": {
+            "slug": f"dylibso/{name}",
+            "has_client": False,
+            "meta": {
+                "schema": {
+                    "name": f"{name}-tool",
+                    "description": name,
+                    "inputSchema": {
+                        "type": "object",
+                        "properties": {
+                            "x": {"type": "number", "minimum": 0, "default": 1}
+                        },
+                    },
+                }
+            },
+        },
+    }
+
+
+class MockAdapter(HTTPAdapter):
+    """
+    Serves requests from `handler(request) -> (status, headers, body)`
+    """
+
+    def __init__(self, handler):
+        super().__init__()
+        self.handler = handler
+        self.requests = []
+
+    def send(self, request, **kw):
+        self.requests.append(request)
+        status, headers, body = self.handler(request)
+        if not isinstance(body, bytes):
+            body = orjson.dumps(body)
+        raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers=headers,
+            status=status,
+            preload_content=False,
+        )
+        return self.build_response(request, raw)
+
+
+def mock_client(handler, **kw):
+    kw.setdefault("prefetch_content", False)
+    kw.setdefault("warm_plugins", False)
+    config = ClientConfig(base_url="https://mcp.test", **kw)
+    client = Client(session_id="test", config=config)
+    adapter = MockAdapter(handler)
+    client._http.mount("https://", adapter)
+    return client, adapter
 
 
 class TestProfileSlug(unittest.TestCase):
@@ -18,6 +95,443 @@ class TestProfileSlug(unittest.TestCase):
         self.assertEqual(slug, "~/test")
 
 
+class TestApi(unittest.TestCase):
+    def test_urls(self):
+        api = Api("https://www.mcp.run")
+        slug = ProfileSlug("~", "default")
+        self.assertEqual(
+            api.installations(slug),
+            "https://www.mcp.run/api/profiles/~/default/installations",
+        )
+        self.assertEqual(
+            api.search("fetch url"), "https://www.mcp.run/api/servlets?q=fetch+url"
+        )
+
+
+class TestClientConfig(unittest.TestCase):
+    def test_positional_order(self):
+        logger = logging.getLogger("test")
+        config = ClientConfig(
+            "https://mcp.test", timedelta(seconds=5), logger, ProfileSlug("a", "b")
+        )
+        self.assertEqual(config.base_url, "https://mcp.test")
+        self.assertEqual(config.tool_refresh_time, timedelta(seconds=5))
+        self.assertIs(config.logger, logger)
+        self.assertEqual(config.profile, "a/b")
+
+
+class TestUser(unittest.TestCase):
+    def test_emails(self):
+        user = User(
+            username="test",
+            emails=[
+                UserEmail(email="a@example.com", primary=False, verified=True),
+                UserEmail(email="b@example.com", primary=True, verified=False),
+            ],
+        )
+        self.assertEqual(user.primary_email.email, "b@example.com")
+        self.assertEqual([e.email for e in user.verified_emails], ["a@example.com"])
+
+    def test_no_primary(self):
+        user = User(username="test", emails=[])
+        self.assertIsNone(user.primary_email)
+        self.assertEqual(user.verified_emails, [])
+
+
+class TestClientClose(unittest.TestCase):
+    def test_context_manager(self):
+        with Client(session_id="test") as client:
+            fut = client._warm_pool.submit(lambda: None)
+            fut.result()
+        with self.assertRaises(RuntimeError):
+            client._pool.submit(lambda: None)
+        with self.assertRaises(RuntimeError):
+            client._warm_pool.submit(lambda: None)
+
+
+class TestClientTools(unittest.TestCase):
+    def test_tools_is_a_copy(self):
+        client = Client(session_id="test")
+        sentinel = object()
+        client._tools_index = {"a": sentinel}
+        client._tools_index_ts = time.monotonic()
+        tools = client.tools
+        tools.pop("a")
+        tools["b"] = sentinel
+        self.assertIs(client.tool("a"), sentinel)
+        self.assertIsNone(client.tool("b"))
+        client.close()
+
+
+class TestListInstalls(unittest.TestCase):
+    def test_not_modified_is_per_profile(self):
+        date = "Wed, 01 Jan 2025 00:00:00 GMT"
+        installs = {
+            "/api/profiles/~/default/installations": [mock_install("a")],
+            "/api/profiles/~/other/installations": [mock_install("b")],
+        }
+
+        def handler(req):
+            if "if-modified-since" in req.headers:
+                return 304, {}, b""
+            path = req.path_url
+            return 200, {"Date": date}, {"installs": installs[path]}
+
+        client, adapter = mock_client(handler)
+        with client:
+            self.assertEqual([s.name for s in client.list_installs()], ["a"])
+            self.assertEqual([s.name for s in client.list_installs("other")], ["b"])
+            self.assertEqual([s.name for s in client.list_installs()], ["a"])
+            self.assertEqual([s.name for s in client.list_installs("other")], ["b"])
+        self.assertEqual(len(adapter.requests), 4)
+        self.assertEqual(adapter.requests[2].headers["if-modified-since"], date)
+
+    def test_concurrent_calls_share_request(self):
+        entered = threading.Event()
+        release = threading.Event()
+
+        def handler(req):
+            entered.set()
+            release.wait(5)
+            return 200, {}, {"installs": [mock_install("a")]}
+
+        logger = logging.getLogger("test.inflight")
+        client, adapter = mock_client(handler, logger=logger)
+        with client, self.assertLogs(logger, logging.DEBUG) as logs:
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                first = pool.submit(lambda: list(client.list_installs()))
+                self.assertTrue(entered.wait(5))
+                second = pool.submit(lambda: list(client.list_installs()))
+                deadline = time.monotonic() + 5
+                while not any("in-flight" in m for m in logs.output):
+                    self.assertLess(time.monotonic(), deadline)
+                    time.sleep(0.01)
+                release.set()
+                a, b = first.result(), second.result()
+        self.assertEqual(len(adapter.requests), 1)
+        self.assertEqual([s.name for s in a], ["a"])
+        self.assertIs(a[0], b[0])
+
+    def test_unchanged_servlet_keeps_plugin(self):
+        installs = [mock_install("a", "addr1"), mock_install("b", "addr1")]
+
+        def handler(req):
+            return 200, {}, {"installs": installs}
+
+        client, _ = mock_client(handler)
+        with client:
+            list(client.list_installs())
+            a = client.install_cache["a"]
+            plugin_a, plugin_b = object(), object()
+            client.plugin_cache.update(a=plugin_a, b=plugin_b)
+            installs[1] = mock_install("b", "addr2")
+            list(client.list_installs())
+            self.assertIs(client.install_cache["a"], a)
+            self.assertIs(client.plugin_cache["a"], plugin_a)
+            self.assertNotIn("b", client.plugin_cache)
+            self.assertEqual(client.install_cache["b"].content_addr, "addr2")
+
+    def test_replaced_servlet_drops_tool_wrappers(self):
+        installs = [mock_install("a", "addr1")]
+
+        def handler(req):
+            return 200, {}, {"installs": installs}
+
+        client, _ = mock_client(handler)
+        with client:
+            list(client.list_installs())
+            tool = client.tool("a-tool")
+            f = client._make_pydantic_function(tool)
+            self.assertIs(client._make_pydantic_function(tool), f)
+            installs[0] = mock_install("a", "addr2")
+            list(client.list_installs())
+            self.assertEqual(client._fn_cache, {})
+            new_tool = client.tool("a-tool")
+            self.assertIsNot(new_tool, tool)
+            self.assertIsNot(client._make_pydantic_function(new_tool), f)
+            self.assertIsNot(client._make_pydantic_function(tool), f)
+            self.assertEqual(list(client._fn_cache), ["a-tool"])
+
+
+class TestETag(unittest.TestCase):
+    def test_not_modified_replays_items(self):
+        ts = "2025-01-01T00:00:00+00:00"
+        servlet = {
+            "slug": "dylibso/fetch",
+            "installation_count": 1,
+            "visibility": "public",
+            "created_at": ts,
+            "modified_at": ts,
+        }
+
+        def handler(req):
+            if req.headers.get("If-None-Match") == '"v1"':
+                return 304, {"ETag": '"v1"'}, b""
+            return 200, {"ETag": '"v1"'}, [servlet]
+
+        client, adapter = mock_client(handler)
+        with client:
+            first = list(client.search("fetch"))
+            second = list(client.search("fetch"))
+        self.assertEqual(len(adapter.requests), 2)
+        self.assertEqual(adapter.requests[1].headers["If-None-Match"], '"v1"')
+        self.assertEqual(first, second)
+        self.assertEqual(second[0].slug, "dylibso/fetch")
+
+
+class TestWarmPlugins(unittest.TestCase):
+    def test_current_profile_only_and_capped(self):
+        def handler(req):
+            names = "abc" if "/~/default/" in req.path_url else "xyz"
+            return 200, {}, {"installs": [mock_install(n) for n in names]}
+
+        client, _ = mock_client(handler, warm_plugins=True, prefetch_limit=2)
+        with client:
+            client._warm_pool = mock.Mock()
+            list(client.list_installs("other"))
+            client._warm_pool.submit.assert_not_called()
+            list(client.list_installs())
+            warmed = [c.args[1].name for c in client._warm_pool.submit.call_args_list]
+            self.assertEqual(warmed, ["a", "b"])
+
+    def test_replaced_servlet_discards_stale_warm_up(self):
+        addr = ["addr1"]
+        refreshing = threading.Event()
+        started = threading.Event()
+        release = threading.Event()
+
+        def handler(req):
+            if req.path_url.startswith("/api/c/"):
+                return 200, {}, f"wasm:{req.path_url}".encode()
+            if addr[0] == "addr2":
+                refreshing.set()
+            return 200, {}, {"installs": [mock_install("a", addr[0])]}
+
+        class SlowPlugin(EchoPlugin):
+            def __init__(self, manifest, **kw):
+                super().__init__(manifest, **kw)
+                if manifest["wasm"][0]["data"] == b"wasm:/api/c/addr1":
+                    started.set()
+                    release.wait(5)
+
+        client, _ = mock_client(handler, warm_plugins=True)
+        try:
+            with (
+                client,
+                mock.patch.object(ext, "Plugin", SlowPlugin),
+                mock.patch.dict(Client._content_store, clear=True),
+                ThreadPoolExecutor(max_workers=1) as pool,
+            ):
+                list(client.list_installs())
+                self.assertTrue(started.wait(5))
+                addr[0] = "addr2"
+                refresh = pool.submit(lambda: list(client.list_installs()))
+                self.assertTrue(refreshing.wait(5))
+                time.sleep(0.05)
+                release.set()
+                refresh.result()
+                plugin = client.plugin(client.install_cache["a"])
+                data = plugin._plugin.manifest["wasm"][0]["data"]
+                self.assertEqual(data, b"wasm:/api/c/addr2")
+        finally:
+            release.set()
+
+
+class EchoPlugin:
+    """
+    Stands in for extism.Plugin, echoing the tool name and arguments
+    """
+
+    def __init__(self, manifest, wasi=True, functions=None):
+        self.manifest = manifest
+
+    def call(self, name, data):
+        params = orjson.loads(data)["params"]
+        text = orjson.dumps(params).decode()
+        return orjson.dumps({"content": [{"type": "text", "text": text}]})
+
+
+class TestCallTool(unittest.TestCase):
+    def test_validates_without_filling_defaults(self):
+        def handler(req):
+            if req.path_url.startswith("/api/c/"):
+                return 200, {}, b"wasm"
+            return 200, {}, {"installs": [mock_install("a")]}
+
+        client, _ = mock_client(handler)
+        with (
+            client,
+            mock.patch.object(ext, "Plugin", EchoPlugin),
+            mock.patch.dict(Client._content_store),
+        ):
+            params = {}
+            res = client.call_tool("a-tool", params)
+            self.assertEqual(params, {})
+            self.assertEqual(orjson.loads(res.content[0].text)["arguments"], {})
+            with self.assertRaises(ValueError):
+                client.call_tool("a-tool", {"x": -1})
+
+    def test_uncompilable_schemas_are_not_validated(self):
+        schemas = {
+            "a": {
+                "type": "object",
+                "properties": {"name": {"type": "string", "pattern": "^\\p{L}+$"}},
+            },
+            "b": {"$ref": "https://schemas.example.com/input.json"},
+        }
+
+        def handler(req):
+            if req.path_url.startswith("/api/c/"):
+                return 200, {}, b"wasm"
+            installs = []
+            for name, schema in schemas.items():
+                install = mock_install(name)
+                install["servlet"]["meta"]["schema"]["inputSchema"] = schema
+                installs.append(install)
+            return 200, {}, {"installs": installs}
+
+        client, _ = mock_client(handler)
+        with (
+            client,
+            mock.patch.object(ext, "Plugin", EchoPlugin),
+            mock.patch.dict(Client._content_store),
+            mock.patch("urllib.request.urlopen") as urlopen,
+        ):
+            for name in schemas:
+                res = client.call_tool(f"{name}-tool", {"name": "Zoë"})
+                args = orjson.loads(res.content[0].text)["arguments"]
+                self.assertEqual(args, {"name": "Zoë"})
+        urlopen.assert_not_called()
+
+    def test_skips_ahead_of_queued_prefetches(self):
+        def handler(req):
+            if req.path_url.startswith("/api/c/"):
+                return 200, {}, b"wasm"
+            installs = [mock_install(n, f"addr-{n}") for n in "abc"]
+            return 200, {}, {"installs": installs}
+
+        client, adapter = mock_client(handler, prefetch_content=True)
+        release = threading.Event()
+        try:
+            with (
+                client,
+                mock.patch.object(ext, "Plugin", EchoPlugin),
+                mock.patch.dict(Client._content_store, clear=True),
+            ):
+                client._prefetch_pool.shutdown()
+                client._prefetch_pool = ThreadPoolExecutor(max_workers=1)
+                client._prefetch_pool.submit(release.wait, 5)
+                client.call_tool("c-tool")
+        finally:
+            release.set()
+        content = [r.path_url for r in adapter.requests if "/api/c/" in r.path_url]
+        self.assertEqual(content, ["/api/c/addr-c"])
+
+
+class TestAsyncClient(unittest.IsolatedAsyncioTestCase):
+    async def test_call_tool_many(self):
+        paths = []
+
+        def handler(req: httpx.Request) -> httpx.Response:
+            paths.append(req.url.path)
+            if req.url.path.endswith("/installations"):
+                installs = [mock_install("a", "addr1"), mock_install("b", "addr2")]
+                return httpx.Response(200, json={"installs": installs})
+            if req.url.path.startswith("/api/c/"):
+                return httpx.Response(200, content=b"wasm")
+            return httpx.Response(404)
+
+        config = ClientConfig(base_url="https://mcp.test")
+        store = zstandard.ZstdCompressor().compress(b"stored")
+        async with AsyncClient(session_id="test", config=config) as client:
+            await client._http.aclose()
+            client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            with (
+                mock.patch.object(ext, "Plugin", EchoPlugin),
+                mock.patch.dict(Client._content_store, {"addr2": store}, clear=True),
+            ):
+                results = await client.call_tool_many(
+                    [("a-tool", {"x": 1}), ("b-tool", None), ("a-tool", {"x": 2})]
+                )
+                self.assertIn("addr1", Client._content_store)
+            plugins = client.plugin_cache
+            self.assertEqual(plugins["a"]._plugin.manifest["wasm"][0]["data"], b"wasm")
+            self.assertEqual(
+                plugins["b"]._plugin.manifest["wasm"][0]["data"], b"stored"
+            )
+            self.assertIsNone(client.install_cache["a"].content)
+        self.assertEqual(
+            [orjson.loads(r.content[0].text) for r in results],
+            [
+                {"arguments": {"x": 1}, "name": "a-tool"},
+                {"arguments": {}, "name": "b-tool"},
+                {"arguments": {"x": 2}, "name": "a-tool"},
+            ],
+        )
+        self.assertEqual(paths.count("/api/profiles/~/default/installations"), 1)
+        self.assertEqual(
+            [p for p in paths if p.startswith("/api/c/")], ["/api/c/addr1"]
+        )
+
+    async def test_gathered_calls_share_one_plugin(self):
+        class SlowPlugin(EchoPlugin):
+            created = 0
+            active = 0
+            max_active = 0
+
+            def __init__(self, *args, **kw):
+                super().__init__(*args, **kw)
+                SlowPlugin.created += 1
+
+            def call(self, name, data):
+                SlowPlugin.active += 1
+                SlowPlugin.max_active = max(SlowPlugin.max_active, SlowPlugin.active)
+                time.sleep(0.05)
+                SlowPlugin.active -= 1
+                return super().call(name, data)
+
+        def handler(req: httpx.Request) -> httpx.Response:
+            if req.url.path.startswith("/api/c/"):
+                return httpx.Response(200, content=b"wasm")
+            return httpx.Response(200, json={"installs": [mock_install("a")]})
+
+        config = ClientConfig(base_url="https://mcp.test")
+        async with AsyncClient(session_id="test", config=config) as client:
+            await client._http.aclose()
+            client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            with (
+                mock.patch.object(ext, "Plugin", SlowPlugin),
+                mock.patch.dict(Client._content_store),
+            ):
+                await client.installs()
+                results = await asyncio.gather(
+                    client.call_tool("a-tool", {"x": 1}),
+                    client.call_tool("a-tool", {"x": 2}),
+                    client.call_tool_many([("a-tool", {"x": 3})]),
+                )
+        self.assertEqual(len(results), 3)
+        self.assertEqual(SlowPlugin.created, 1)
+        self.assertEqual(SlowPlugin.max_active, 1)
+
+    async def test_call_tool_many_validates_first(self):
+        paths = []
+
+        def handler(req: httpx.Request) -> httpx.Response:
+            paths.append(req.url.path)
+            installs = [mock_install("a", "addr1")]
+            return httpx.Response(200, json={"installs": installs})
+
+        config = ClientConfig(base_url="https://mcp.test")
+        async with AsyncClient(session_id="test", config=config) as client:
+            await client._http.aclose()
+            client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            with self.assertRaises(ValueError):
+                await client.call_tool_many(
+                    [("a-tool", {"x": 1}), ("a-tool", {"x": -1})]
+                )
+        self.assertEqual(paths, ["/api/profiles/~/default/installations"])
+
+
 class TestClient(unittest.TestCase):
     def client(self):
         try: